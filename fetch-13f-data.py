@@ -5,13 +5,52 @@ Supports: Berkshire Hathaway, Vanguard, Soros Fund Management
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List
 import xml.etree.ElementTree as ET
 
+class TokenBucketLimiter:
+    """
+    Thread-safe token-bucket rate limiter
+    
+    Allows bursts of up to `rate` requests and only blocks once the bucket is empty,
+    instead of sleeping before every request.
+    """
+    
+    def __init__(self, rate: float, per: float = 1.0):
+        """
+        Args:
+            rate: Number of requests allowed per `per` seconds
+            per: Length of the rate window in seconds
+        """
+        self.capacity = rate
+        self.request_tokens = rate
+        self.fill_rate = rate / per
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping only as long as needed for it to refill"""
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.last_update
+            self.request_tokens = min(self.capacity, self.request_tokens + elapsed * self.fill_rate)
+            self.last_update = now
+            
+            if self.request_tokens < 1:
+                time.sleep((1 - self.request_tokens) / self.fill_rate)
+                self.last_update = time.monotonic()
+                self.request_tokens = 0
+            else:
+                self.request_tokens -= 1
+
 class SEC13FDataFetcher:
     def __init__(self):
         self.base_url = "https://www.sec.gov/cgi-bin/browse-edgar"
@@ -19,7 +58,16 @@ class SEC13FDataFetcher:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
         self.sec_api_key = os.environ.get('SEC_API_KEY', '')
-        self.request_delay = 0.5  # 500ms delay between requests
+        self.rate_limiter = TokenBucketLimiter(rate=2)  # Max 2 requests per second
+        
+        # Reuse one keep-alive connection pool for all EDGAR requests
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        ))
         
     def fetch_13f_filings(self, cik: str, fund_name: str) -> List[Dict]:
         """
@@ -45,13 +93,12 @@ class SEC13FDataFetcher:
         }
         
         try:
-            # Add delay to avoid rate limiting
-            time.sleep(self.request_delay)
+            # Wait for a rate-limit token to avoid being throttled by SEC
+            self.rate_limiter.acquire()
             
-            response = requests.get(
+            response = self.session.get(
                 self.base_url, 
                 params=params, 
-                headers=self.headers, 
                 timeout=15
             )
             response.raise_for_status()
@@ -153,11 +200,11 @@ def main():
         '0001086364': 'Soros Fund Management LLC'
     }
     
-    # Attempt to fetch data for each fund
-    for cik, fund_name in funds.items():
-        print(f"\nFetching data for {fund_name}...")
-        filings = fetcher.fetch_13f_filings(cik, fund_name)
-        
+    # Attempt to fetch data for each fund concurrently (the shared rate limiter keeps us within SEC limits)
+    with ThreadPoolExecutor(max_workers=len(funds)) as executor:
+        results = list(executor.map(lambda fund: fetcher.fetch_13f_filings(*fund), funds.items()))
+    
+    for fund_name, filings in zip(funds.values(), results):
         if filings:
             all_data[fund_name] = {
                 'filing_date': datetime.now().isoformat(),
@@ -1,19 +1,61 @@
 import requests
-import json
 import os
-import time
-from datetime import datetime, timedelta
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import yfinance as yf
 import pandas as pd
+import numpy as np
+import requests_cache
 import random
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# JSON backend: orjson when available, otherwise ujson, otherwise the standard library
+try:
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj, indent=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        import json as _json
+
+    def _loads(data):
+        return _json.loads(data)
+
+    def _dumps(obj, indent=False):
+        kwargs = {"indent": 2} if indent else {}
+        return _json.dumps(obj, ensure_ascii=False, **kwargs).encode('utf-8')
 
 # --- Configuration ---
 DATA_DIR = "data"
-MAX_RETRIES = 3
-RETRY_DELAY = 5 # seconds
+CACHE_DIR = ".cache" # Local HTTP cache for repeated runs on the same machine
+CACHE_POLICY = os.getenv("CACHE_POLICY", "enabled").lower() # enabled | disabled | replay
+MAX_RETRIES = 3 # Retries per request, handled by the session's urllib3 Retry adapter
 HIBOR_FRESHNESS_DAYS = 5 # Max days old for HIBOR data to be considered fresh
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
+DEBUG = os.getenv("SYNC_DEBUG", "").lower() in ("1", "true", "yes") # Pretty-print JSON output when set
+WRITE_PARQUET = os.getenv("SYNC_WRITE_PARQUET", "").lower() in ("1", "true", "yes") # Also write market history as Parquet
+FULL_HISTORY_DAYS = 45 # Calendar days downloaded when there is no usable history (covers 30 trading days)
+INCREMENTAL_OVERLAP_DAYS = 7 # Days re-downloaded before the last stored bar so every symbol has a previous close
+YF_BATCH_SIZE = 20 # Max symbols per yf.download call (Yahoo URL symbol limit)
+YF_MAX_WORKERS = 4 # Concurrent yf.download batches
+YF_THREADS_PER_BATCH = 8 # yfinance download threads within each batch
+JSON_WRITE_WORKERS = 4 # Concurrent output file writes
+US_MARKET_CLOSE_UTC_HOUR = 21 # Hour (UTC) by which the US session has closed and daily bars are final
+
+# Data source endpoints
+FNG_API_URL = "https://api.alternative.me/fng/"
+HKMA_HIBOR_URL = "https://api.hkma.gov.hk/public/market-data-and-statistics/monthly-statistical-bulletin/er-ir/hk-interbank-ir-daily"
+HIBOR_REQUIRED_KEYS = ('ir_1m', 'ir_3m', 'ir_6m') # Corrected keys based on raw JSON inspection
+HIBOR_TERM_KEYS = (('Overnight', 'ir_overnight'), ('1個月', 'ir_1m'), ('3個月', 'ir_3m'), ('6個月', 'ir_6m')) # (display term, HKMA record key)
 
 # Setup Logging
 logging.basicConfig(
@@ -26,6 +68,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Create the output directory once up front instead of on every save
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Shared HTTP session: keeps connections alive between requests to the same host and
+# serves repeated GETs from a local SQLite cache within their expiry window.
+# Expired entries with an ETag/Last-Modified are revalidated with a conditional request,
+# so unchanged payloads come back as a 304 and are read from disk.
+SESSION = requests_cache.CachedSession(
+    os.path.join(CACHE_DIR, "http_cache"),
+    expire_after=timedelta(hours=6),
+    allowable_methods=['GET'],
+    cache_control=True,
+    urls_expire_after={
+        "api.alternative.me": 900,
+        "www.alphavantage.co": 900,
+        "api.hkma.gov.hk": 3600,
+    }
+)
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=MAX_RETRIES, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+if CACHE_POLICY == "disabled":
+    SESSION.settings.disabled = True
+elif CACHE_POLICY == "replay":
+    # Serve every request from the cache (even if expired) and never touch the network.
+    # yfinance does not use SESSION, so the Yahoo fetchers reuse the stored output files instead.
+    SESSION.settings.only_if_cached = True
+    SESSION.settings.stale_if_error = True
+    SESSION.settings.read_only = True
+
 # Yahoo Finance Symbols (Confirmed symbols for all required data points)
 YAHOO_SYMBOLS = {
     # Market Breadth (US) - Standard ETF tickers
@@ -41,6 +118,14 @@ YAHOO_SYMBOLS = {
     "VOO": "VOO", "VTI": "VTI", "BND": "BND", "BIL": "BIL"
 }
 
+# Money fund proxies: only the latest close is published (money_fund_data.json), no history
+MONEY_FUND_SYMBOLS = frozenset({"VOO", "VTI", "BND", "BIL"})
+MONEY_FUND_YAHOO_SYMBOLS = frozenset(YAHOO_SYMBOLS[key] for key in MONEY_FUND_SYMBOLS)
+# Symbols whose 30-day history is published in market_data_history.json
+HISTORY_SYMBOLS = tuple(key for key in YAHOO_SYMBOLS if key not in MONEY_FUND_SYMBOLS)
+# History symbols that follow the US trading calendar (HSI/N225 trade on Asian calendars and lag)
+US_HISTORY_SYMBOLS = tuple(key for key in HISTORY_SYMBOLS if key not in ("HSI", "N225"))
+
 # --- Helper Functions ---
 
 def get_current_13f_quarter():
@@ -81,12 +166,6 @@ def get_current_13f_quarter():
         return f"Q3 {year}"
 
 
-
-
-
-
-
-
 def _get_user_agent() -> str:
     """Get a random User-Agent strings to avoid being blocked by scraping targets."""
     user_agent_strings = [
@@ -98,79 +177,163 @@ def _get_user_agent() -> str:
     ]
     return random.choice(user_agent_strings)
 
+def _remove_tmp(path):
+    """Removes the temporary file left behind by a failed atomic write, if any."""
+    try:
+        os.remove(path + '.tmp')
+    except FileNotFoundError:
+        pass
+
 def save_json(data, filename):
-    """Saves data to a JSON file in the data directory."""
+    """Saves data to a JSON file in the data directory, replacing it atomically."""
+    path = os.path.join(DATA_DIR, filename)
+    try:
+        buf = memoryview(_dumps(data, indent=DEBUG))
+        # Write the serialized bytes straight to the fd, bypassing the buffered file-object layers
+        fd = os.open(path + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while buf:
+                buf = buf[os.write(fd, buf):]
+        finally:
+            os.close(fd)
+        # Swap the finished file into place so readers never see a partially written one
+        os.replace(path + '.tmp', path)
+        logger.info(f"Successfully saved data to {path}")
+    except Exception as e:
+        logger.error(f"Error saving {filename}: {e}")
+        _remove_tmp(path)
+
+def save_json_many(outputs):
+    """Saves several (data, filename) pairs concurrently; each file is written independently."""
+    with ThreadPoolExecutor(max_workers=JSON_WRITE_WORKERS) as executor:
+        list(executor.map(lambda output: save_json(*output), outputs))
+
+def save_json_stream(items, filename):
+    """Saves (key, value) pairs to a JSON object file, serializing one entry at a time and replacing it atomically."""
     path = os.path.join(DATA_DIR, filename)
     try:
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        # Match save_json's layout: compact, or two-space indented (nested values shifted one level) under SYNC_DEBUG
+        sep, colon = (b'\n  ', b': ') if DEBUG else (b'', b':')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(b'{')
+            count = 0
+            for key, value in items:
+                entry = _dumps(value, indent=DEBUG).replace(b'\n', b'\n  ')
+                f.write((b',' if count else b'') + sep + _dumps(key) + colon + entry)
+                count += 1
+            f.write(b'\n}' if DEBUG and count else b'}')
+        os.replace(path + '.tmp', path)
         logger.info(f"Successfully saved data to {path}")
     except Exception as e:
         logger.error(f"Error saving {filename}: {e}")
+        _remove_tmp(path)
 
-def process_yahoo_data(symbol, df):
+def process_yahoo_data(yahoo_frames):
     """
-    Processes raw yfinance DataFrame to calculate daily changes,
-    and includes the critical division-by-zero check and 30-day truncation.
+    Processes all per-symbol yfinance DataFrames in a single long-form pass to calculate
+    daily changes, drop holiday gaps and apply the 30-day truncation.
+    Returns a long DataFrame with columns Ticker, date, close, change_percent, volume.
     """
-    if df.empty:
-        return []
+    if not yahoo_frames:
+        return pd.DataFrame(columns=['Ticker', 'date', 'close', 'change_percent', 'volume'])
 
-    # Calculate daily percentage change for Close price
-    df['change_percent'] = df['Close'].pct_change() * 100
-    
-    # Clean up and format
-    df = df.reset_index()
-    if pd.api.types.is_datetime64_any_dtype(df["Date"]):
-        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-    
-    # Select and rename columns for final output
-    df = df.rename(columns={'Date': 'date', 'Close': 'close', 'Volume': 'volume'}) # Rename columns
-    df = df[["date", "close", "change_percent", "volume"]] # Select and reorder columns
-    time_series_list = df.to_dict('records')
-    
-    # Remove rows with NaN close prices (e.g., holidays)
-    time_series_list = [item for item in time_series_list if not pd.isna(item['close'])]
+    # Stack every symbol into one long DataFrame indexed by (Ticker, Date)
+    df = pd.concat(yahoo_frames, names=['Ticker', 'Date'])
+
+    # Remove rows with NaN close prices (e.g., holidays), then keep the latest 31 trading days per symbol
+    # (30 for frontend display plus the previous close) before calculating daily percentage change
+    df = df.dropna(subset=['Close']).reset_index()
+    df = df.groupby('Ticker').tail(31).copy()
+    df['change_percent'] = df.groupby('Ticker')['Close'].pct_change() * 100
+
+    # Remove the first row of each symbol (NaN change)
+    df = df.dropna(subset=['change_percent'])
 
-    # Remove the first row (NaN change) if it still exists
-    if time_series_list and pd.isna(time_series_list[0]['change_percent']):
-        time_series_list.pop(0)
+    # Trim precision so records serialize compactly (e.g. 450.25 instead of 450.2500000000001)
+    df['Close'] = df['Close'].round(4)
+    df['change_percent'] = df['change_percent'].round(3)
+    # Nullable integer volume: a missing volume stays missing (null in JSON) instead of becoming 0
+    df['Volume'] = df['Volume'].round().astype('UInt64')
+
+    # Clean up and format
+    if pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+    df = df.rename(columns={'Date': 'date', 'Close': 'close', 'Volume': 'volume'})
+    return df[['Ticker', 'date', 'close', 'change_percent', 'volume']]
+
+def split_records_by_symbol(df):
+    """Splits the long market DataFrame into a dict of Yahoo symbol -> list of daily records."""
+    records_by_symbol = {}
+    # Zip over plain column lists (native Python values) instead of per-group DataFrame.to_dict
+    volumes = df['volume'].astype(object).where(df['volume'].notna(), None).tolist()
+    for ticker, date, close, change_percent, volume in zip(
+        df['Ticker'].tolist(), df['date'].tolist(), df['close'].tolist(),
+        df['change_percent'].tolist(), volumes
+    ):
+        records_by_symbol.setdefault(ticker, []).append(
+            {"date": date, "close": close, "change_percent": change_percent, "volume": volume}
+        )
+    return records_by_symbol
+
+def save_parquet(df, filename):
+    """Saves a DataFrame to a zstd-compressed Parquet file in the data directory (requires pyarrow)."""
+    path = os.path.join(DATA_DIR, filename)
+    try:
+        df.astype({'Ticker': 'category'}).to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+        logger.info(f"Successfully saved data to {path}")
+    except Exception as e:
+        logger.error(f"Error saving {filename}: {e}")
 
-    # Final Optimization: Only keep the latest 30 trading days for frontend display
-    return time_series_list[-30:]
+def download_yahoo_batch(symbols, start_date):
+    """Downloads one batch of symbols from Yahoo Finance and splits it into per-symbol Close/Volume DataFrames."""
+    df_batch = yf.download(symbols, start=start_date, interval="1d", auto_adjust=False,
+                           group_by='ticker', threads=min(YF_THREADS_PER_BATCH, len(symbols)), progress=False)
+    if df_batch.empty:
+        return {}
+    # Only Close and Volume are used downstream; drop the other price columns right away
+    if not isinstance(df_batch.columns, pd.MultiIndex):
+        return {symbols[0]: df_batch[['Close', 'Volume']]}
+    tickers = set(df_batch.columns.get_level_values(0))
+    return {symbol: df_batch[symbol][['Close', 'Volume']] for symbol in symbols if symbol in tickers}
+
+class CacheMissError(requests.exceptions.HTTPError):
+    """Raised in CACHE_POLICY=replay when a request has no cached response."""
 
 def fetch_with_retry(url, headers=None, timeout=15):
-    """Attempts to fetch a URL with a retry mechanism."""
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = requests.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {url}: {e}")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY * (attempt + 1)) # Exponential backoff
-            else:
-                logger.error(f"All {MAX_RETRIES} attempts failed for {url}.")
-                raise
+    """
+    Fetches a URL through the shared session. Connection errors and 429/5xx responses are
+    retried with backoff by the session's Retry adapter, so there is no retry loop here.
+    """
+    try:
+        response = SESSION.get(url, headers=headers, timeout=timeout)
+        if CACHE_POLICY == "replay" and response.status_code == 504:
+            # requests_cache answers cache misses with a synthetic 504; retrying can't help
+            raise CacheMissError(f"Not in the local cache (CACHE_POLICY=replay): {url}", response=response)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request failed for {url}: {e}")
+        raise
+
+def fetch_json(url, headers=None, timeout=15):
+    """Fetches a URL with retries and decodes the JSON body straight from the response bytes."""
+    return _loads(fetch_with_retry(url, headers=headers, timeout=timeout).content)
 
 # --- Data Fetching Functions ---
 
 def fetch_alternative_fng():
     """Fetches the Crypto Fear & Greed Index from Alternative.me API."""
-    url = "https://api.alternative.me/fng/"
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    url = FNG_API_URL
     error_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "timestamp": timestamp,
         "value": 0,
         "sentiment": "ERROR",
         "source": "Fetch Failed: Alternative.me API error."
     }
     
     try:
-        response = fetch_with_retry(url)
-        data = response.json()
+        data = fetch_json(url)
         
         if data and data.get('data') and len(data['data']) > 0:
             fng_data = data['data'][0]
@@ -189,7 +352,7 @@ def fetch_alternative_fng():
             sentiment = fng_data.get('value_classification', 'ERROR')
             
             final_data = {
-                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "timestamp": timestamp,
                 "value": value,
                 "sentiment": sentiment,
                 "source": "Alternative.me (Crypto) API"
@@ -202,6 +365,10 @@ def fetch_alternative_fng():
         save_json(error_data, 'fear_greed_index.json')
         return False
 
+    except CacheMissError:
+        # Replay cache miss: keep the stored file rather than replacing it with an error payload
+        logger.warning("CACHE_POLICY=replay: keeping stored fear_greed_index.json.")
+        return load_json('fear_greed_index.json') is not None
     except Exception as e:
         error_data["source"] = f"Fetch Failed: Network or Parsing Error: {str(e)[:100]}..."
         save_json(error_data, 'fear_greed_index.json')
@@ -210,18 +377,18 @@ def fetch_alternative_fng():
 
 def fetch_hkma_hibor():
     """Fetches HIBOR rates from HKMA API with corrected field names and backtracking."""
-    url = "https://api.hkma.gov.hk/public/market-data-and-statistics/monthly-statistical-bulletin/er-ir/hk-interbank-ir-daily"
-    keys = ['ir_1m', 'ir_3m', 'ir_6m'] # Corrected keys based on raw JSON inspection
+    now = datetime.now()
+    timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+    url = HKMA_HIBOR_URL
     
     error_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "timestamp": timestamp,
         "rates": [{"term": "ERROR", "rate": 0.0, "date": "N/A"}],
         "error_message": "Fetch Failed: Network or API Error."
     }
 
     try:
-        response = fetch_with_retry(url)
-        data = response.json()
+        data = fetch_json(url)
         
         if data.get('header', {}).get('success') != True or not data.get('result', {}).get('records'):
             error_data["error_message"] = f"Fetch Failed: HKMA API returned error or no records. Message: {data.get('header', {}).get('err_msg')}"
@@ -236,24 +403,19 @@ def fetch_hkma_hibor():
         
         for record in records:
             # Check if all required keys have valid, non-null values
-            if all(record.get(key) is not None for key in keys):
-                data_date = record['end_of_day']
-                
+            if all(record.get(key) is not None for key in HIBOR_REQUIRED_KEYS):
                 # Data Validation for HIBOR rates
                 try:
-                    valid_rates = {
-                        'Overnight': float(record.get('ir_overnight', 0.0)),
-                        '1個月': float(record.get('ir_1m', 0.0)),
-                        '3個月': float(record.get('ir_3m', 0.0)),
-                        '6個月': float(record.get('ir_6m', 0.0)),
-                    }
+                    rates = {term: float(record.get(key, 0.0)) for term, key in HIBOR_TERM_KEYS}
                     # Simple check to ensure rates are positive and reasonable
-                    if any(rate <= 0 for rate in valid_rates.values()):
+                    if any(rate <= 0 for rate in rates.values()):
                         raise ValueError("HIBOR rate is non-positive.")
                 except (ValueError, TypeError) as e:
                     logger.error(f"HIBOR Data Validation Failed: Invalid rate value. {e}")
                     continue # Skip this record and check the next one
 
+                valid_rates = rates
+                data_date = record['end_of_day']
                 break # Found a valid record, break the loop
 
         if not valid_rates:
@@ -265,13 +427,13 @@ def fetch_hkma_hibor():
         # Data Freshness Check
         try:
             date_obj = datetime.strptime(data_date, '%Y-%m-%d')
-            if (datetime.now() - date_obj).days > HIBOR_FRESHNESS_DAYS:
+            if (now - date_obj).days > HIBOR_FRESHNESS_DAYS:
                 logger.warning(f"HIBOR data is old. Date: {data_date}. Max freshness: {HIBOR_FRESHNESS_DAYS} days.")
         except ValueError:
             logger.warning(f"Could not parse HIBOR data date: {data_date}")
 
         final_data = {
-            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),         "data_date": data_date,
+            "timestamp": timestamp,         "data_date": data_date,
             "rates": [
                 {"term": term, "rate": rate} for term, rate in valid_rates.items()
             ]
@@ -280,382 +442,259 @@ def fetch_hkma_hibor():
         logger.info("Successfully fetched HIBOR rates.")
         return True
             
+    except CacheMissError:
+        # Replay cache miss: keep the stored file rather than replacing it with an error payload
+        logger.warning("CACHE_POLICY=replay: keeping stored hibor_rates.json.")
+        return load_json("hibor_rates.json") is not None
     except Exception as e:
         error_data["error_message"] = f"Fetch Failed: Network or API Error: {str(e)[:100]}..."
         save_json(error_data, "hibor_rates.json")
         logger.error(f"Failed to fetch HIBOR data: {e}")
         return False
 
-def fetch_market_data():
-    """Fetches market data (indices, ETFs, money funds) using yfinance."""
-    start_date = (datetime.now() - timedelta(days=45)).strftime('%Y-%m-%d')
+def load_json(filename):
+    """Loads a JSON file from the data directory, returning None if it is missing or unreadable."""
+    path = os.path.join(DATA_DIR, filename)
+    try:
+        with open(path, 'rb') as f:
+            return _loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+
+def _is_valid_record(record):
+    """Returns True if a stored history record is a dict with a YYYY-MM-DD 'date'."""
+    if not isinstance(record, dict) or not isinstance(record.get('date'), str):
+        return False
+    try:
+        datetime.strptime(record['date'], '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+def load_market_history():
+    """
+    Loads the stored market history used for incremental updates. Returns {} (forcing a full download)
+    if the file is missing or not shaped like {symbol: [{"date": "YYYY-MM-DD", ...}, ...]}.
+    """
+    history = load_json("market_data_history.json")
+    if history is None:
+        return {}
+    if not isinstance(history, dict) or not all(
+        isinstance(records, list) and all(_is_valid_record(record) for record in records)
+        for records in history.values()
+    ):
+        logger.warning("Stored market_data_history.json is malformed; downloading the full history instead.")
+        return {}
+    return history
+
+def get_incremental_start_date(previous_history):
+    """
+    Returns the download start date needed to extend the previous market history, or None
+    if a full download is required (no usable history or symbols missing from it).
+    """
+    if not previous_history or any(not previous_history.get(key) for key in HISTORY_SYMBOLS):
+        return None
+    earliest_last_date = min(previous_history[key][-1]['date'] for key in HISTORY_SYMBOLS)
+    start = datetime.strptime(earliest_last_date, '%Y-%m-%d') - timedelta(days=INCREMENTAL_OVERLAP_DAYS)
+    # Never request more than a full download would
+    full_start = datetime.now() - timedelta(days=FULL_HISTORY_DAYS)
+    return max(start, full_start).strftime('%Y-%m-%d')
+
+def merge_history(previous_records, new_records):
+    """Appends freshly processed records to the previous history, replacing overlapping dates, and keeps 30 days."""
+    if not new_records:
+        merged = list(previous_records or [])
+    else:
+        first_new_date = new_records[0]['date']
+        merged = [record for record in (previous_records or []) if record['date'] < first_new_date] + new_records
+    merged = merged[-30:]
+    for record in merged:
+        record.pop('name', None)
+    return merged
+
+def get_last_us_session_date(now=None):
+    """
+    Returns the date (YYYY-MM-DD) of the most recent US trading session that has closed.
+    Only weekends are skipped; exchange holidays are not accounted for.
+    """
+    now = now or datetime.now(timezone.utc)
+    session_day = now.date()
+    if now.hour < US_MARKET_CLOSE_UTC_HOUR:
+        session_day -= timedelta(days=1)
+    while session_day.weekday() >= 5: # Saturday/Sunday
+        session_day -= timedelta(days=1)
+    return session_day.strftime('%Y-%m-%d')
+
+def get_open_us_session_date(now=None):
+    """
+    Returns today's date (YYYY-MM-DD) if it is a weekday before the US close, i.e. any bar dated today
+    may still be partial; otherwise None.
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.weekday() < 5 and now.hour < US_MARKET_CLOSE_UTC_HOUR:
+        return now.strftime('%Y-%m-%d')
+    return None
+
+def is_history_current(previous_history):
+    """Returns True if every US-listed history symbol already has a bar for the last closed US session."""
+    if not previous_history or any(not previous_history.get(key) for key in US_HISTORY_SYMBOLS):
+        return False
+    earliest_last_date = min(previous_history[key][-1]['date'] for key in US_HISTORY_SYMBOLS)
+    return earliest_last_date >= get_last_us_session_date()
+
+def fetch_market_data(force=False):
+    """
+    Fetches market data (indices, ETFs, money funds) using yfinance.
+    Unless force is set, the download is skipped when the stored history already covers the last
+    closed US session (weekends, reruns before the next close); the existing files are kept as is.
+    """
+    previous_history = load_market_history()
+    if CACHE_POLICY == "replay":
+        if not previous_history.get("VIX") or not previous_history.get("GSPC"):
+            logger.error("CACHE_POLICY=replay: no stored market history to reuse; skipping Yahoo Finance.")
+            return False, None, None
+        logger.info("CACHE_POLICY=replay: reusing stored market history instead of downloading from Yahoo Finance.")
+        return True, previous_history["VIX"][-1].get('close'), previous_history["GSPC"][-1].get('volume')
+    if not force and is_history_current(previous_history):
+        logger.info("Market history is already up to date with the last US session; skipping Yahoo Finance download.")
+        return True, previous_history["VIX"][-1].get('close'), previous_history["GSPC"][-1].get('volume')
+    start_date = get_incremental_start_date(previous_history)
+    if start_date:
+        logger.info(f"Extending existing market history from {start_date}.")
+    else:
+        start_date = (datetime.now() - timedelta(days=FULL_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        previous_history = {}
     market_data_history = {}
     money_fund_data = []
-    latest_vix_close = None
-    latest_gspc_volume = None
-    latest_vix_close = None
-    latest_gspc_volume = None
+    latest_by_symbol = {} # symbol key -> most recent daily record
     yahoo_symbols_list = list(YAHOO_SYMBOLS.values())
+    batches = [yahoo_symbols_list[i:i + YF_BATCH_SIZE] for i in range(0, len(yahoo_symbols_list), YF_BATCH_SIZE)]
     
     try:
-        df_all = yf.download(yahoo_symbols_list, start=start_date, interval="1d", auto_adjust=False, progress=False)
-        if df_all.empty:
+        with ThreadPoolExecutor(max_workers=YF_MAX_WORKERS) as executor:
+            results = list(executor.map(lambda batch: download_yahoo_batch(batch, start_date), batches))
+        yahoo_frames = {}
+        for result in results:
+            yahoo_frames.update(result)
+        if not yahoo_frames:
             logger.error("Yahoo Finance returned no data.")
-            return False
+            return False, None, None
     except Exception as e:
         logger.error(f"Error fetching from Yahoo Finance: {e}")
-        return False
+        return False, None, None
+
+    # Bars dated on a session that hasn't closed yet are intraday partials; a run after the close
+    # picks them up through the incremental overlap, so they are never stored as final
+    open_session_date = get_open_us_session_date()
+    if open_session_date:
+        for yahoo_symbol, frame in yahoo_frames.items():
+            yahoo_frames[yahoo_symbol] = frame[frame.index.strftime('%Y-%m-%d') != open_session_date]
+
+    # Money funds only publish their latest point, so only the last two closes are needed for the daily change
+    for yahoo_symbol in MONEY_FUND_YAHOO_SYMBOLS.intersection(yahoo_frames):
+        yahoo_frames[yahoo_symbol] = yahoo_frames[yahoo_symbol].dropna(subset=['Close']).tail(2)
+
+    try:
+        market_df = process_yahoo_data(yahoo_frames)
+        processed_by_symbol = split_records_by_symbol(market_df)
+    except Exception as e:
+        logger.error(f"Could not process Yahoo Finance data: {e}")
+        return False, None, None
 
     for symbol_key, yahoo_symbol in YAHOO_SYMBOLS.items():
         try:
-            if isinstance(df_all['Close'], pd.DataFrame):
-                df = df_all.loc[:, (slice(None), yahoo_symbol)].droplevel(1, axis=1)
-            else:
-                df = df_all
-            
-            if not df.empty:
-                processed_data = process_yahoo_data(symbol_key, df)
-                if symbol_key in ["VOO", "VTI", "BND", "BIL"]:
-                    if processed_data:
-                        latest_data = processed_data[-1]
-                        money_fund_data.append({
-                            "symbol": symbol_key,
-                            "latest_price": latest_data['close'],
-                            "daily_change_percent": latest_data['change_percent'],
-                            "date": latest_data['date']
-                        })
+            processed_data = processed_by_symbol.get(yahoo_symbol)
+            if symbol_key not in MONEY_FUND_SYMBOLS:
+                processed_data = merge_history(previous_history.get(symbol_key), processed_data)
+            if processed_data:
+                latest_data = latest_by_symbol[symbol_key] = processed_data[-1]
+                if symbol_key in MONEY_FUND_SYMBOLS:
+                    money_fund_data.append({
+                        "symbol": symbol_key,
+                        "latest_price": latest_data['close'],
+                        "daily_change_percent": latest_data['change_percent'],
+                        "date": latest_data['date']
+                    })
                 else:
-                    if processed_data:
-                        if symbol_key == "VIX" and processed_data:
-                            latest_vix_close = processed_data[-1]['close']
-                        elif symbol_key == "GSPC" and processed_data:
-                            latest_gspc_volume = processed_data[-1]['volume']
-                        
-                        if symbol_key == "VIX" and processed_data:
-                            latest_vix_close = processed_data[-1]['close']
-                        elif symbol_key == "GSPC" and processed_data:
-                            latest_gspc_volume = processed_data[-1]['volume']
-                        
-                        if symbol_key == "VIX" and processed_data:
-                            latest_vix_close = processed_data[-1]['close']
-                        elif symbol_key == "GSPC" and processed_data:
-                            latest_gspc_volume = processed_data[-1]['volume']
-                        
-                        processed_data[0]['name'] = symbol_key 
-                        market_data_history[symbol_key] = processed_data
+                    processed_data[0]['name'] = symbol_key 
+                    market_data_history[symbol_key] = processed_data
         except Exception as e:
             logger.error(f"Could not process data for {symbol_key}: {e}")
 
-    save_json(market_data_history, "market_data_history.json")
-    save_json({
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "funds": money_fund_data
-    }, "money_fund_data.json")
+    # The output files are independent, so write them concurrently instead of one after another
+    with ThreadPoolExecutor(max_workers=JSON_WRITE_WORKERS) as executor:
+        executor.submit(save_json_stream, market_data_history.items(), "market_data_history.json")
+        executor.submit(save_json, {
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "funds": money_fund_data
+        }, "money_fund_data.json")
+        if WRITE_PARQUET and market_data_history:
+            history_df = pd.concat(
+                {key: pd.DataFrame(records) for key, records in market_data_history.items()}, names=['Ticker', None]
+            ).reset_index(level='Ticker').drop(columns='name', errors='ignore')
+            executor.submit(save_parquet, history_df, "market_data_history.parquet")
     logger.info("Successfully fetched market data from Yahoo Finance.")
+    latest_vix_close = latest_by_symbol.get("VIX", {}).get('close')
+    latest_gspc_volume = latest_by_symbol.get("GSPC", {}).get('volume')
     return True, latest_vix_close, latest_gspc_volume
 
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                  "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
-
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                  "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
-
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-    save_json(financial_ratios_data, "financial_ratios.json")
-    return True
-
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
-
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-    save_json(financial_ratios_data, "financial_ratios.json")
-    return True
-
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
-
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-    save_json(financial_ratios_data, "financial_ratios.json")
-    return True
-
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
-
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-    save_json(financial_ratios_data, "financial_ratios.json")
-    return True
-
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
-
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-    save_json(financial_ratios_data, "financial_ratios.json")
-    return True
-
-def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
-    tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
+def fetch_ticker_ratios(ticker_symbol, timestamp):
+    """Fetches P/E and dividend yield for a single ticker using yfinance."""
+    try:
+        ticker = yf.Ticker(ticker_symbol)
+        info = ticker.info
+
+        pe_ratio = info.get("trailingPE")
+        dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
+        # For forward P/E, could use info.get("forwardPE")
+        # For P/B, could use info.get("priceToBook")
+
+        logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
+        return {
+            "symbol": ticker_symbol,
+            "timestamp": timestamp,
+            "pe_ratio": pe_ratio,
+            "dividend_yield": dividend_yield,
+            "source": "Yahoo Finance"
+        }
 
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
-    
-    save_json(financial_ratios_data, "financial_ratios.json")
-    return True
+    except Exception as e:
+        logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
+        return {
+            "symbol": ticker_symbol,
+            "timestamp": timestamp,
+            "pe_ratio": None,
+            "dividend_yield": None,
+            "source": f"Fetch Failed: {e}"
+        }
 
 def fetch_financial_ratios():
-    """Fetches key financial ratios for selected tickers using yfinance."""
+    """Fetches key financial ratios for selected tickers concurrently using yfinance."""
+    if CACHE_POLICY == "replay":
+        logger.info("CACHE_POLICY=replay: keeping stored financial_ratios.json instead of querying Yahoo Finance.")
+        return load_json("financial_ratios.json") is not None
     tickers_to_fetch = ["SPY", "QQQ"]
-    financial_ratios_data = []
-
-    for ticker_symbol in tickers_to_fetch:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-
-            pe_ratio = info.get("trailingPE")
-            dividend_yield = info.get("dividendYield") # This is usually annual dividend yield
-            # For forward P/E, could use info.get("forwardPE")
-            # For P/B, could use info.get("priceToBook")
-
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": pe_ratio,
-                "dividend_yield": dividend_yield,
-                "source": "Yahoo Finance"
-            })
-            logger.info(f"Successfully fetched financial ratios for {ticker_symbol}.")
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        except Exception as e:
-            logger.error(f"Failed to fetch financial ratios for {ticker_symbol}: {e}")
-            financial_ratios_data.append({
-                "symbol": ticker_symbol,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "source": f"Fetch Failed: {e}"
-            })
+    with ThreadPoolExecutor(max_workers=len(tickers_to_fetch)) as executor:
+        financial_ratios_data = list(executor.map(lambda symbol: fetch_ticker_ratios(symbol, timestamp), tickers_to_fetch))
     
     save_json(financial_ratios_data, "financial_ratios.json")
     return True
 
 def fetch_market_breadth_alpha_vantage():
     """Fetches market breadth data using Alpha Vantage Sector Performance API."""
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     if not ALPHA_VANTAGE_API_KEY:
         logger.error("ALPHA_VANTAGE_API_KEY not set for market breadth.")
         return False
 
     url = f"https://www.alphavantage.co/query?function=SECTOR&apikey={ALPHA_VANTAGE_API_KEY}"
     error_data = {
-          "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+          "timestamp": timestamp,
         "advancing_issues": 0,
         "declining_issues": 0,
         "new_highs": 0,
@@ -665,8 +704,7 @@ def fetch_market_breadth_alpha_vantage():
     }
 
     try:
-        response = fetch_with_retry(url)
-        data = response.json()
+        data = fetch_json(url)
 
         if "Error Message" in data:
             error_message = data["Error Message"]
@@ -679,18 +717,15 @@ def fetch_market_breadth_alpha_vantage():
         # We will use a simplified approach for market breadth based on sector performance.
         if "Rank A: Realtime Performance" in data:
             realtime_performance = data["Rank A: Realtime Performance"]
-            advancing_sectors = 0
-            declining_sectors = 0
-            
-            for sector, change_percent_str in realtime_performance.items():
-                change_percent = float(change_percent_str.replace("%", ""))
-                if change_percent > 0:
-                    advancing_sectors += 1
-                elif change_percent < 0:
-                    declining_sectors += 1
+            change_percents = np.fromiter(
+                (float(change_percent_str.replace("%", "")) for change_percent_str in realtime_performance.values()),
+                dtype=np.float64
+            )
+            advancing_sectors = int((change_percents > 0).sum())
+            declining_sectors = int((change_percents < 0).sum())
             
             final_data = {
-                  "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                  "timestamp": timestamp,
                 "advancing_issues": advancing_sectors * 100, # Scale for a more 'issue-like' number
                 "declining_issues": declining_sectors * 100,
                 "new_highs": 0, # Not directly available from this API
@@ -706,6 +741,10 @@ def fetch_market_breadth_alpha_vantage():
         save_json(error_data, "market_breadth.json")
         return False
 
+    except CacheMissError:
+        # Replay cache miss: keep the stored file rather than replacing it with an error payload
+        logger.warning("CACHE_POLICY=replay: keeping stored market_breadth.json.")
+        return load_json("market_breadth.json") is not None
     except Exception as e:
         error_data["source"] = f"Fetch Failed: Network or Parsing Error: {str(e)[:100]}..."
         save_json(error_data, "market_breadth.json")
@@ -713,6 +752,8 @@ def fetch_market_breadth_alpha_vantage():
         return False
 def generate_dummy_data(fng_value=None, fng_sentiment=None, vix_value=None, gspc_volume=None, financial_ratios=None):
     """Generates dummy data for files not covered by real-time fetching."""
+    now = datetime.now()
+    timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
     # Dynamic AI Analysis based on F&G Index
     analysis_text = "市場情緒中性，建議保持觀望。"
     rating = "Neutral"
@@ -791,7 +832,7 @@ def generate_dummy_data(fng_value=None, fng_sentiment=None, vix_value=None, gspc
             if dividend_yield is not None and dividend_yield > 0.03: # Arbitrary high dividend yield threshold (3%)
                 analysis_text += f" {symbol}的股息收益率 ({dividend_yield:.2%}) 較高，對尋求穩定收益的投資者具有吸引力。" 
     f13_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "timestamp": timestamp,
         "fund_name": f"伯克希爾·哈撒韋 (BRK.B) 13F 持倉 ({get_current_13f_quarter()})",
         "total_value": round(random.uniform(380.0, 450.0), 2),
         "cash_ratio": round(random.uniform(150.0, 180.0), 2),
@@ -810,38 +851,34 @@ def generate_dummy_data(fng_value=None, fng_sentiment=None, vix_value=None, gspc
             {"symbol": "HPQ", "value": round(random.uniform(0.5, 2.0), 2), "change": round(random.uniform(-1.0, 1.0), 2)},
         ]
     }
-    save_json(f13_data, '13f-data.json')
     
     market_sentiment = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),     "consensus": {
+        "timestamp": timestamp,     "consensus": {
             "latest_sentiment": "中性偏多",
-            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            "timestamp": timestamp
         }
     }
-    save_json(market_sentiment, 'market_sentiment.json')
 
     # Dummy data for previously unhandled files to ensure timestamp update
     fund_flows = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "timestamp": timestamp,
         "flows": [
-            {"date": (datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d'), "flow": 1.2, "type": "ETF"},
-            {"date": (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'), "flow": -0.5, "type": "Mutual Fund"},
+            {"date": (now - timedelta(days=2)).strftime('%Y-%m-%d'), "flow": 1.2, "type": "ETF"},
+            {"date": (now - timedelta(days=1)).strftime('%Y-%m-%d'), "flow": -0.5, "type": "Mutual Fund"},
         ]
     }
-    save_json(fund_flows, 'fund_flows.json')
 
     market_sentiment_history = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "timestamp": timestamp,
         "history": [
-            {"date": (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d'), "sentiment": "Greed", "value": 65},
-            {"date": (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d'), "sentiment": "Neutral", "value": 50},
+            {"date": (now - timedelta(days=7)).strftime('%Y-%m-%d'), "sentiment": "Greed", "value": 65},
+            {"date": (now - timedelta(days=3)).strftime('%Y-%m-%d'), "sentiment": "Neutral", "value": 50},
         ]
     }
-    save_json(market_sentiment_history, 'market_sentiment_history.json')
 
     # Dummy data for market_breadth.json as a fallback
     market_breadth_dummy = {
-          "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+          "timestamp": timestamp,
         "advancing_issues": 1850,
         "declining_issues": 1240,
         "new_highs": 125,
@@ -849,7 +886,14 @@ def generate_dummy_data(fng_value=None, fng_sentiment=None, vix_value=None, gspc
         "a_d_line": 610,
         "source": "Dummy Data (Fallback)"
     }
-    save_json(market_breadth_dummy, 'market_breadth.json')
+
+    save_json_many([
+        (f13_data, '13f-data.json'),
+        (market_sentiment, 'market_sentiment.json'),
+        (fund_flows, 'fund_flows.json'),
+        (market_sentiment_history, 'market_sentiment_history.json'),
+        (market_breadth_dummy, 'market_breadth.json'),
+    ])
 
     logger.info("Successfully generated dummy data.")
 
@@ -857,29 +901,34 @@ def generate_dummy_data(fng_value=None, fng_sentiment=None, vix_value=None, gspc
 
 if __name__ == "__main__":
     logger.info("Starting data synchronization script...")
-    # Fetch F&G first to use in AI analysis
-    fng_success = fetch_alternative_fng()
+    force_refresh = "--force" in sys.argv[1:] # Download market data even if the stored history is current
+    # The fetchers hit independent hosts and write separate files, so run them concurrently
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        fng_future = executor.submit(fetch_alternative_fng)
+        hibor_future = executor.submit(fetch_hkma_hibor)
+        market_future = executor.submit(fetch_market_data, force_refresh)
+        ratios_future = executor.submit(fetch_financial_ratios)
+        breadth_future = executor.submit(fetch_market_breadth_alpha_vantage)
+
+    # Use F&G in AI analysis
+    fng_success = fng_future.result()
     fng_value = None
     fng_sentiment = None
     if fng_success:
-        try:
-            with open(os.path.join(DATA_DIR, 'fear_greed_index.json'), 'r', encoding='utf-8') as f:
-                fng_data = json.load(f)
-                fng_value = fng_data.get('value')
-                fng_sentiment = fng_data.get('sentiment')
-        except Exception as e:
-            logger.error(f"Failed to read fear_greed_index.json for AI analysis: {e}")
+        fng_data = load_json('fear_greed_index.json')
+        if fng_data:
+            fng_value = fng_data.get('value')
+            fng_sentiment = fng_data.get('sentiment')
+        else:
+            logger.error("Failed to read fear_greed_index.json for AI analysis.")
 
-    fetch_hkma_hibor()
-    market_data_success, latest_vix_close, latest_gspc_volume = fetch_market_data()
-    fetch_financial_ratios()
-    financial_ratios_data = None
-    try:
-        with open(os.path.join(DATA_DIR, 'financial_ratios.json'), 'r', encoding='utf-8') as f:
-            financial_ratios_data = json.load(f)
-    except Exception as e:
-        logger.error(f"Failed to read financial_ratios.json for AI analysis: {e}")
+    hibor_future.result()
+    market_data_success, latest_vix_close, latest_gspc_volume = market_future.result()
+    ratios_future.result()
+    financial_ratios_data = load_json('financial_ratios.json')
+    if financial_ratios_data is None:
+        logger.error("Failed to read financial_ratios.json for AI analysis.")
 
-    fetch_market_breadth_alpha_vantage()
+    breadth_future.result()
     generate_dummy_data(fng_value, fng_sentiment, latest_vix_close, latest_gspc_volume, financial_ratios_data)
     logger.info("Data synchronization complete.")